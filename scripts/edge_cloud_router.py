@@ -0,0 +1,652 @@
+"""Cost-aware edge/cloud routing on top of the per-axis task classifiers.
+
+The router reads the probabilities of the ``complexity`` and ``privacy``
+models exported by ``task_classification_pipeline.py`` and picks the
+placement with the lowest expected latency + energy cost:
+
+    1. P(private) >= privacy_threshold or a privacy keyword match
+                                        -> edge (hard constraint, never cloud)
+    2. P(complex) >= complex_threshold  -> cloud
+    3. otherwise the placement with the lower expected cost
+
+Both thresholds are tuned offline by a batched grid search over one part of
+a labelled hold-out, keeping recall of non-private ``complex`` tasks (routed
+to cloud) at or above the 0.92 guardrail from docs/task_modeling_experiment.md
+and never sending a labelled-private task to the cloud. Candidate privacy
+thresholds are lowered by a safety margin before they are evaluated, and
+latency savings are reported on the other part of the hold-out.
+
+Usage examples:
+    python edge_cloud_router.py tune --cost-table configs/router_costs.json
+    python edge_cloud_router.py tune --device-logs logs/android/*.jsonl
+    python edge_cloud_router.py route --input data/raw/app_requests.jsonl --output routes.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from task_classification_pipeline import (
+    LABEL_DIR,
+    MODEL_DIR,
+    PROCESSED_DIR,
+    REPORT_DIR,
+    KeywordHeuristicLabeler,
+    SampleRecord,
+    _basic_feature_frame,
+    load_feature_config,
+    token_extra_features,
+    load_jsonl,
+    save_jsonl,
+)
+
+
+LOGGER = logging.getLogger("edge_cloud_router")
+
+
+PLACEMENTS = ("edge", "cloud")
+COMPLEXITIES = ("simple", "complex")
+COMPLEX_RECALL_GUARDRAIL = 0.92
+ROUTER_CONFIG_PATH = MODEL_DIR / "router_thresholds.json"
+# Documented on-device strategies (docs/logging_guidelines.md); anything else,
+# including edge_cloud, must log an explicit "placement".
+STRATEGY_PLACEMENTS = {"edge_llama_cpp": "edge", "mlc_gpu": "edge"}
+
+
+@dataclass
+class CostEntry:
+    """Measured cost of running one complexity class on one placement.
+
+    ``latency_samples_ms`` keeps the logged latencies so percentiles can be
+    resampled; ``latency_ms`` is their mean and drives the routing cost.
+    """
+
+    latency_ms: float
+    energy_mwh: float
+    samples: int = 0
+    latency_samples_ms: List[float] = field(default_factory=list)
+
+
+@dataclass
+class RouterThresholds:
+    """Tuned decision thresholds plus the cost weighting they were tuned with."""
+
+    complex_threshold: float = 0.5
+    privacy_threshold: float = 0.5
+    energy_weight: float = 100.0
+
+
+@dataclass
+class RoutingDecision:
+    sample_id: str
+    placement: str
+    reason: str
+    p_complex: float
+    p_private: float
+    expected_cost: float
+
+
+class CostTable:
+    """Latency/energy per (placement, complexity), from a JSON table or device logs."""
+
+    def __init__(self, entries: Dict[Tuple[str, str], CostEntry]):
+        missing = [key for key in _cost_keys() if key not in entries]
+        if missing:
+            raise ValueError(f"Cost table is missing entries for {missing}")
+        self.entries = entries
+
+    @classmethod
+    def from_json(cls, path: Path) -> "CostTable":
+        """Load ``{"edge": {"simple": {"latency_ms": .., "energy_mwh": ..}, ...}, "cloud": {...}}``.
+
+        Entries may also carry ``latency_samples_ms`` for percentile reporting.
+        """
+        with path.open("r", encoding="utf-8") as fh:
+            raw = json.load(fh)
+        entries = {
+            (placement, complexity): CostEntry(**raw[placement][complexity])
+            for placement, complexity in _cost_keys()
+            if complexity in raw.get(placement, {})
+        }
+        return cls(entries)
+
+    @classmethod
+    def from_device_logs(cls, paths: Iterable[Path], labels: Dict[str, dict]) -> "CostTable":
+        """Average latency and energy of logged runs (docs/logging_guidelines.md).
+
+        Rows are joined to labels on ``id`` to get their complexity. The placement
+        is the row's ``placement`` field (``edge``/``cloud``), falling back to
+        STRATEGY_PLACEMENTS for the documented on-device strategies.
+        """
+        buckets: Dict[Tuple[str, str], List[Tuple[float, float]]] = {}
+        skipped = 0
+        for path in paths:
+            for row in load_jsonl(path):
+                label = labels.get(str(row.get("id")))
+                if label is None or "start_ms" not in row or "end_ms" not in row:
+                    skipped += 1
+                    continue
+                placement = row.get("placement") or STRATEGY_PLACEMENTS.get(row.get("strategy"))
+                if placement not in PLACEMENTS:
+                    raise ValueError(
+                        f"{path}: log row {row.get('id')!r} (strategy {row.get('strategy')!r}) "
+                        f"needs a 'placement' field set to one of {PLACEMENTS}"
+                    )
+                latency = float(row["end_ms"]) - float(row["start_ms"])
+                energy = float(row.get("energy_mwh") or 0.0)
+                buckets.setdefault((placement, label["complexity"]), []).append((latency, energy))
+        if skipped:
+            LOGGER.warning("Skipped %d log rows without a matching label or timestamps", skipped)
+        missing = sorted({p for p, c in _cost_keys() if (p, c) not in buckets})
+        if missing:
+            raise ValueError(
+                f"Device logs have no labelled runs for placement {missing} "
+                "(check the rows' 'placement' field and complexity labels)"
+            )
+        entries = {
+            key: CostEntry(
+                latency_ms=float(np.mean([latency for latency, _ in rows])),
+                energy_mwh=float(np.mean([energy for _, energy in rows])),
+                samples=len(rows),
+                latency_samples_ms=[latency for latency, _ in rows],
+            )
+            for key, rows in buckets.items()
+        }
+        return cls(entries)
+
+    def matrix(self, field: str) -> np.ndarray:
+        """``field`` as a (placement, complexity) array ordered like PLACEMENTS x COMPLEXITIES."""
+        return np.array(
+            [[getattr(self.entries[(p, c)], field) for c in COMPLEXITIES] for p in PLACEMENTS]
+        )
+
+    def cost_matrix(self, energy_weight: float) -> np.ndarray:
+        return self.matrix("latency_ms") + energy_weight * self.matrix("energy_mwh")
+
+    def has_latency_samples(self) -> bool:
+        return all(entry.latency_samples_ms for entry in self.entries.values())
+
+    def sample_latency(
+        self, is_complex: np.ndarray, repeats: int = 200, seed: int = 42
+    ) -> np.ndarray:
+        """Resampled per-request latency, shaped (repeats, N, placement).
+
+        Each (repeat, request) uses one uniform draw for both placements, so
+        policies compared on the same draws differ only by their decisions.
+        Buckets without logged samples fall back to their mean.
+        """
+        rng = np.random.default_rng(seed)
+        uniform = rng.random((repeats, len(is_complex)))
+        draws = np.empty((repeats, len(is_complex), len(PLACEMENTS)))
+        for p_idx, placement in enumerate(PLACEMENTS):
+            for c_idx, complexity in enumerate(COMPLEXITIES):
+                entry = self.entries[(placement, complexity)]
+                pool = np.asarray(entry.latency_samples_ms or [entry.latency_ms], dtype=float)
+                mask = is_complex.astype(int) == c_idx
+                picks = np.minimum((uniform[:, mask] * len(pool)).astype(int), len(pool) - 1)
+                draws[:, mask, p_idx] = pool[picks]
+        return draws
+
+
+def _cost_keys() -> List[Tuple[str, str]]:
+    return [(p, c) for p in PLACEMENTS for c in COMPLEXITIES]
+
+
+def _positive_proba(clf, X, positive: str) -> np.ndarray:
+    classes = list(clf.classes_)
+    if positive not in classes:
+        return np.zeros(len(X))
+    return clf.predict_proba(X)[:, classes.index(positive)]
+
+
+class EdgeCloudRouter:
+    """Batch router combining classifier probabilities with a cost table."""
+
+    def __init__(
+        self,
+        costs: CostTable,
+        thresholds: Optional[RouterThresholds] = None,
+        model_name: str = "logistic_regression",
+    ):
+        self.costs = costs
+        self.thresholds = thresholds or RouterThresholds()
+        self.model_name = model_name
+        # Rebuild the same extra features the exported classifiers were trained with.
+        tokenizer = load_feature_config(model_name)
+        self.extra_features = token_extra_features(tokenizer) if tokenizer else None
+        self._models: Dict[str, object] = {}
+
+    def _model(self, axis: str):
+        if axis not in self._models:
+            import joblib
+
+            self._models[axis] = joblib.load(MODEL_DIR / f"{self.model_name}_{axis}.joblib")
+        return self._models[axis]
+
+    def predict_proba(self, samples: Sequence[SampleRecord]) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(p_complex, p_private)`` for a batch of samples."""
+        X = _basic_feature_frame(list(samples), self.extra_features)
+        p_complex = _positive_proba(self._model("complexity"), X, "complex")
+        p_private = _positive_proba(self._model("privacy"), X, "private")
+        return p_complex, p_private
+
+    def decide(
+        self,
+        p_complex: np.ndarray,
+        p_private: np.ndarray,
+        keyword_private: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Vectorised decision: placement index (0=edge, 1=cloud), reason code, expected cost."""
+        t = self.thresholds
+        placement, reason = _decide_grid(
+            p_complex[None, :],
+            p_private[None, :],
+            np.array([t.complex_threshold]),
+            np.array([t.privacy_threshold]),
+            self.costs.cost_matrix(t.energy_weight),
+            keyword_private,
+        )
+        expected = _expected_costs(p_complex, self.costs.cost_matrix(t.energy_weight))
+        chosen = np.take_along_axis(expected, placement[0][:, None], axis=1)[:, 0]
+        return placement[0], reason[0], chosen
+
+    def route_batch(self, samples: Sequence[SampleRecord]) -> List[RoutingDecision]:
+        if not samples:
+            return []
+        p_complex, p_private = self.predict_proba(samples)
+        placement, reason, cost = self.decide(p_complex, p_private, keyword_private(samples))
+        return [
+            RoutingDecision(
+                sample_id=sample.sample_id,
+                placement=PLACEMENTS[placement[idx]],
+                reason=REASONS[reason[idx]],
+                p_complex=float(p_complex[idx]),
+                p_private=float(p_private[idx]),
+                expected_cost=float(cost[idx]),
+            )
+            for idx, sample in enumerate(samples)
+        ]
+
+
+REASONS = ("privacy", "complex", "cost")
+
+
+def _expected_costs(p_complex: np.ndarray, cost_matrix: np.ndarray) -> np.ndarray:
+    """(N, placement) expected cost mixing the simple/complex costs by P(complex)."""
+    mix = np.stack([1.0 - p_complex, p_complex], axis=1)
+    return mix @ cost_matrix.T
+
+
+def _decide_grid(
+    p_complex: np.ndarray,
+    p_private: np.ndarray,
+    complex_thresholds: np.ndarray,
+    privacy_thresholds: np.ndarray,
+    cost_matrix: np.ndarray,
+    keyword_private: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Decisions for G threshold pairs over N samples at once, both shaped (G, N)."""
+    p_complex = np.broadcast_to(p_complex, (len(complex_thresholds), p_complex.shape[-1]))
+    p_private = np.broadcast_to(p_private, p_complex.shape)
+    expected = _expected_costs(p_complex[0], cost_matrix)
+    cheaper = np.broadcast_to((expected[:, 1] < expected[:, 0]).astype(int), p_complex.shape)
+
+    private = p_private >= privacy_thresholds[:, None]
+    if keyword_private is not None:
+        private = private | keyword_private[None, :]
+    complex_ = p_complex >= complex_thresholds[:, None]
+    placement = np.where(private, 0, np.where(complex_, 1, cheaper))
+    reason = np.where(private, 0, np.where(complex_, 1, 2))
+    return placement, reason
+
+
+def tune_thresholds(
+    p_complex: np.ndarray,
+    p_private: np.ndarray,
+    is_complex: np.ndarray,
+    is_private: np.ndarray,
+    costs: CostTable,
+    *,
+    keyword_private: Optional[np.ndarray] = None,
+    energy_weight: float = 100.0,
+    min_complex_recall: float = COMPLEX_RECALL_GUARDRAIL,
+    privacy_margin: float = 0.1,
+    grid_size: int = 41,
+    batch_cells: int = 1_000_000,
+) -> Tuple[RouterThresholds, dict]:
+    """Grid search minimising mean realised cost under the recall and privacy constraints.
+
+    Every candidate privacy threshold is lowered by ``privacy_margin`` before it is
+    evaluated, so the hard constraint does not sit exactly on the tuning sample's
+    boundary and the summary describes the thresholds that are deployed.
+    Threshold pairs are evaluated in batches of about ``batch_cells`` decisions
+    so memory stays bounded on large hold-outs.
+    """
+    grid = np.linspace(0.0, 1.0, grid_size)
+    complex_grid, privacy_grid = (axis.ravel() for axis in np.meshgrid(grid, grid, indexing="ij"))
+    privacy_grid = np.maximum(privacy_grid - privacy_margin, 0.0)
+    cost_matrix = costs.cost_matrix(energy_weight)
+    complex_idx = is_complex.astype(int)[None, :]
+
+    recall = np.empty(len(complex_grid))
+    leaks = np.empty(len(complex_grid), dtype=int)
+    realised = np.empty(len(complex_grid))
+    step = max(1, batch_cells // max(len(p_complex), 1))
+    for start in range(0, len(complex_grid), step):
+        batch = slice(start, start + step)
+        placement, _ = _decide_grid(
+            p_complex,
+            p_private,
+            complex_grid[batch],
+            privacy_grid[batch],
+            cost_matrix,
+            keyword_private,
+        )
+        recall[batch], leaks[batch] = _guardrails(placement, is_complex, is_private)
+        realised[batch] = cost_matrix[placement, complex_idx].mean(axis=1)
+
+    feasible = (recall >= min_complex_recall) & (leaks == 0)
+    if feasible.any():
+        # Among equal-cost pairs prefer the highest thresholds, i.e. the fewest forced placements.
+        cost = np.where(feasible, realised, np.inf)
+        best = int(np.lexsort((-complex_grid, -privacy_grid, cost))[0])
+    else:
+        LOGGER.warning(
+            "No threshold pair reaches complex recall %.2f without privacy leaks; "
+            "picking the highest-recall leak-free pair",
+            min_complex_recall,
+        )
+        best = int(np.argmax(np.where(leaks == 0, recall, -1.0)))
+
+    thresholds = RouterThresholds(
+        complex_threshold=float(complex_grid[best]),
+        privacy_threshold=float(privacy_grid[best]),
+        energy_weight=energy_weight,
+    )
+    summary = {
+        "grid_points": int(len(complex_grid)),
+        "feasible_points": int(feasible.sum()),
+        "privacy_margin": privacy_margin,
+        "complex_recall": float(recall[best]),
+        "private_leaks": int(leaks[best]),
+        "mean_cost": float(realised[best]),
+    }
+    return thresholds, summary
+
+
+def _guardrails(
+    placement: np.ndarray, is_complex: np.ndarray, is_private: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Complex recall and private leak count along the last (sample) axis."""
+    to_cloud = placement == 1
+    # Private complex tasks must stay on the device, so recall only counts the routable ones.
+    routable_complex = is_complex & ~is_private
+    routable = int(routable_complex.sum())
+    if routable:
+        recall = (to_cloud & routable_complex).sum(axis=-1) / routable
+    else:
+        # Nothing to recall: the guardrail is trivially met.
+        recall = np.ones(to_cloud.shape[:-1])
+    leaks = (to_cloud & is_private).sum(axis=-1)
+    return recall, leaks
+
+
+def keyword_private(samples: Sequence[SampleRecord]) -> np.ndarray:
+    """Privacy keyword matches from the heuristic labeler, always kept on the device."""
+    labeler = KeywordHeuristicLabeler()
+    return np.array([labeler.label(sample).privacy == "private" for sample in samples], dtype=bool)
+
+
+def split_holdout(size: int, report_fraction: float, seed: int = 42) -> Tuple[np.ndarray, np.ndarray]:
+    """Random (tune, report) index split of the hold-out."""
+    order = np.random.default_rng(seed).permutation(size)
+    n_report = int(round(size * report_fraction))
+    return order[n_report:], order[:n_report]
+
+
+def heuristic_placement(samples: Sequence[SampleRecord]) -> np.ndarray:
+    """Bucket A from the A/B plan: keyword heuristic only (private -> edge, complex -> cloud)."""
+    labeler = KeywordHeuristicLabeler()
+    placement = []
+    for sample in samples:
+        label = labeler.label(sample)
+        placement.append(int(label.privacy != "private" and label.complexity == "complex"))
+    return np.array(placement, dtype=int)
+
+
+def latency_report(
+    router_placement: np.ndarray,
+    heuristic: np.ndarray,
+    is_complex: np.ndarray,
+    costs: CostTable,
+) -> dict:
+    """P50/P95 of resampled per-request latency for the router and heuristic policies."""
+    if not costs.has_latency_samples():
+        LOGGER.warning("Cost table has no latency samples for some buckets; percentiles use bucket means")
+    draws = costs.sample_latency(is_complex)
+    columns = np.arange(len(is_complex))
+    router_latency = draws[:, columns, router_placement].ravel()
+    heuristic_latency = draws[:, columns, heuristic].ravel()
+    router_p95 = float(np.percentile(router_latency, 95))
+    heuristic_p95 = float(np.percentile(heuristic_latency, 95))
+    return {
+        "router_p50_ms": float(np.percentile(router_latency, 50)),
+        "router_p95_ms": router_p95,
+        "heuristic_p50_ms": float(np.percentile(heuristic_latency, 50)),
+        "heuristic_p95_ms": heuristic_p95,
+        "p95_savings_ms": heuristic_p95 - router_p95,
+        "p95_savings_pct": 100.0 * (heuristic_p95 - router_p95) / heuristic_p95 if heuristic_p95 else 0.0,
+        "router_cloud_share": float(router_placement.mean()),
+        "heuristic_cloud_share": float(heuristic.mean()),
+        "latency_distribution": "empirical" if costs.has_latency_samples() else "bucket_means",
+    }
+
+
+def load_holdout(path: Optional[Path]) -> Tuple[List[SampleRecord], List[dict]]:
+    """Labelled hold-out as (samples, labels), aligned by position."""
+    if path and path.exists():
+        rows = load_jsonl(path)
+        samples = [
+            SampleRecord(
+                sample_id=str(row["sample_id"]),
+                source=row.get("source", "app"),
+                query=row["query"],
+                context=row.get("context"),
+                reference=row.get("reference"),
+            )
+            for row in rows
+        ]
+        return samples, rows
+
+    LOGGER.warning("No hold-out file given; tuning on the training labels (optimistic)")
+    labels = {row["sample_id"]: row for row in load_jsonl(LABEL_DIR / "labels.jsonl")}
+    samples = [
+        SampleRecord(**row)
+        for row in load_jsonl(PROCESSED_DIR / "combined_samples.jsonl")
+        if row["sample_id"] in labels
+    ]
+    return samples, [labels[sample.sample_id] for sample in samples]
+
+
+def load_costs(args: argparse.Namespace) -> CostTable:
+    if args.cost_table:
+        return CostTable.from_json(args.cost_table)
+    if args.device_logs:
+        labels = {str(row["sample_id"]): row for row in load_jsonl(LABEL_DIR / "labels.jsonl")}
+        return CostTable.from_device_logs(args.device_logs, labels)
+    raise SystemExit("Either --cost-table or --device-logs is required")
+
+
+def load_thresholds(path: Path) -> RouterThresholds:
+    if not path.exists():
+        LOGGER.warning("%s not found; using default thresholds", path)
+        return RouterThresholds()
+    with path.open("r", encoding="utf-8") as fh:
+        return RouterThresholds(**json.load(fh))
+
+
+def run_tune(args: argparse.Namespace) -> dict:
+    costs = load_costs(args)
+    samples, labels = load_holdout(args.holdout)
+    is_complex = np.array([row["complexity"] == "complex" for row in labels])
+    is_private = np.array([row["privacy"] == "private" for row in labels])
+
+    forced = keyword_private(samples)
+
+    router = EdgeCloudRouter(costs, model_name=args.model)
+    p_complex, p_private = router.predict_proba(samples)
+
+    tune_idx, report_idx = split_holdout(len(samples), args.report_fraction)
+    evaluation = "out_of_sample"
+    if len(report_idx) == 0 or len(tune_idx) == 0:
+        LOGGER.warning("Hold-out too small to split; report figures are in-sample")
+        tune_idx = report_idx = np.arange(len(samples))
+        evaluation = "in_sample"
+
+    thresholds, summary = tune_thresholds(
+        p_complex[tune_idx],
+        p_private[tune_idx],
+        is_complex[tune_idx],
+        is_private[tune_idx],
+        costs,
+        keyword_private=forced[tune_idx],
+        energy_weight=args.energy_weight,
+        min_complex_recall=args.min_complex_recall,
+        privacy_margin=args.privacy_margin,
+        grid_size=args.grid_size,
+    )
+    router.thresholds = thresholds
+    placement, _, _ = router.decide(p_complex[report_idx], p_private[report_idx], forced[report_idx])
+    recall, leaks = _guardrails(placement, is_complex[report_idx], is_private[report_idx])
+    heuristic = heuristic_placement([samples[idx] for idx in report_idx])
+    report = {
+        "thresholds": asdict(thresholds),
+        "tuning": summary,
+        "evaluation": evaluation,
+        "report": {"complex_recall": float(recall), "private_leaks": int(leaks)},
+        "latency": latency_report(placement, heuristic, is_complex[report_idx], costs),
+        "holdout_size": len(samples),
+        "tune_size": int(len(tune_idx)),
+        "report_size": int(len(report_idx)),
+    }
+
+    ROUTER_CONFIG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with ROUTER_CONFIG_PATH.open("w", encoding="utf-8") as fh:
+        json.dump(asdict(thresholds), fh, indent=2)
+    REPORT_DIR.mkdir(parents=True, exist_ok=True)
+    with (REPORT_DIR / "router_report.json").open("w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2, ensure_ascii=False)
+
+    LOGGER.info(
+        "Tuned thresholds complex=%.3f privacy=%.3f (complex recall %.3f)",
+        thresholds.complex_threshold,
+        thresholds.privacy_threshold,
+        summary["complex_recall"],
+    )
+    LOGGER.info(
+        "Expected P95 latency %.0f ms vs heuristic-only %.0f ms (%.1f%% savings, %s)",
+        report["latency"]["router_p95_ms"],
+        report["latency"]["heuristic_p95_ms"],
+        report["latency"]["p95_savings_pct"],
+        evaluation.replace("_", "-"),
+    )
+    if report["report"]["complex_recall"] < args.min_complex_recall or report["report"]["private_leaks"]:
+        LOGGER.warning(
+            "Guardrails not met on the report split: complex recall %.3f, %d private leaks",
+            report["report"]["complex_recall"],
+            report["report"]["private_leaks"],
+        )
+    return report
+
+
+def run_route(args: argparse.Namespace) -> List[RoutingDecision]:
+    costs = load_costs(args)
+    router = EdgeCloudRouter(costs, load_thresholds(ROUTER_CONFIG_PATH), model_name=args.model)
+    rows = load_jsonl(args.input)
+    samples = [
+        SampleRecord(
+            sample_id=str(row.get("sample_id", f"request-{idx}")),
+            source=row.get("source", "app"),
+            query=row["query"],
+            context=row.get("context"),
+        )
+        for idx, row in enumerate(rows)
+    ]
+    decisions: List[RoutingDecision] = []
+    for start in range(0, len(samples), args.batch_size):
+        decisions.extend(router.route_batch(samples[start : start + args.batch_size]))
+    save_jsonl(args.output, (asdict(decision) for decision in decisions))
+    LOGGER.info("Routed %d requests to %s", len(decisions), args.output)
+    return decisions
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Cost-aware edge/cloud router")
+    parser.add_argument("command", choices=["tune", "route"])
+    parser.add_argument("--cost-table", type=Path, default=None, help="JSON cost table per placement/complexity")
+    parser.add_argument(
+        "--device-logs",
+        type=Path,
+        nargs="*",
+        default=None,
+        help="Device JSONL logs to build the cost table from (joined to labels on id)",
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="logistic_regression",
+        choices=["logistic_regression", "decision_tree"],
+        help="Classifier family exported by the pipeline",
+    )
+    parser.add_argument("--holdout", type=Path, default=None, help="Labelled hold-out JSONL for tuning")
+    parser.add_argument("--energy-weight", type=float, default=100.0, help="Cost in ms per mWh")
+    parser.add_argument("--min-complex-recall", type=float, default=COMPLEX_RECALL_GUARDRAIL)
+    parser.add_argument(
+        "--privacy-margin",
+        type=float,
+        default=0.1,
+        help="Amount subtracted from the tuned privacy threshold",
+    )
+    parser.add_argument(
+        "--report-fraction",
+        type=float,
+        default=0.3,
+        help="Share of the hold-out kept out of tuning for the report",
+    )
+    parser.add_argument("--grid-size", type=int, default=41, help="Grid points per threshold axis")
+    parser.add_argument("--input", type=Path, default=None, help="Requests JSONL to route")
+    parser.add_argument("--output", type=Path, default=REPORT_DIR / "routes.jsonl")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument(
+        "--log-level",
+        type=str,
+        default="INFO",
+        help="Logging level (DEBUG, INFO, WARNING, ERROR)",
+    )
+    args = parser.parse_args()
+    if args.command == "route" and args.input is None:
+        parser.error("route requires --input")
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(
+        level=getattr(logging, args.log_level.upper(), logging.INFO),
+        format="%(levelname)s - %(message)s",
+    )
+    if args.command == "tune":
+        run_tune(args)
+    else:
+        run_route(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""Prefill/decode latency predictor fitted from on-device JSONL logs.
+
+Token counts come from the downloaded model's ``tokenizer.json`` (Hugging Face
+``tokenizers`` in batched mode) instead of whitespace splitting, which badly
+undercounts Chinese text. For every ``(device, model)`` pair found in the logs
+(``model`` is the model/quant tag, e.g. ``qwen2.5-1.5b-q4_K_M``) two linear
+models are fitted:
+
+    prefill_ms ~ prompt_tokens + prompt_tokens / threads
+    decode_ms  ~ output_tokens + output_tokens / threads
+
+The thread terms are only used when the logs for that pair vary ``threads``.
+Predictions are returned in microseconds; tokenizer-based prompt token counts
+can be added as classifier features via ``TokenCounter.feature_columns``.
+
+Usage examples:
+    python latency_predictor.py fit --logs logs/android/*.jsonl \
+        --tokenizer ../models/qwen2.5-1.5b/tokenizer.json
+    python latency_predictor.py predict --query "帮我总结这篇文章" \
+        --device pixel8 --model qwen2.5-1.5b-q4_K_M
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from task_classification_pipeline import MODEL_DIR, load_jsonl
+
+
+LOGGER = logging.getLogger("latency_predictor")
+
+
+PREDICTOR_PATH = MODEL_DIR.parent / "latency_predictor.json"
+UNKNOWN = "unknown"
+
+
+class TokenCounter:
+    """Batched prompt token counting with a ``tokenizer.json`` file."""
+
+    def __init__(self, tokenizer_path: Path):
+        from tokenizers import Tokenizer
+
+        self.tokenizer_path = Path(tokenizer_path)
+        self._tokenizer = Tokenizer.from_file(str(self.tokenizer_path))
+
+    def count(self, texts: Sequence[str]) -> List[int]:
+        if not texts:
+            return []
+        encodings = self._tokenizer.encode_batch(list(texts), add_special_tokens=False)
+        return [len(encoding.ids) for encoding in encodings]
+
+    def feature_columns(self):
+        """Return a ``_basic_feature_frame`` extra-feature hook adding ``prompt_tokens``.
+
+        Latency predictions are not emitted: for a fixed target they are a linear
+        function of the token count and would only add collinear columns.
+        """
+
+        def columns(texts: List[str]) -> Dict[str, List[float]]:
+            return {"prompt_tokens": self.count(texts)}
+
+        return columns
+
+
+@dataclass
+class StageFit:
+    """Least-squares fit ``ms = intercept + per_token * n + per_token_thread * n / threads``."""
+
+    intercept: float
+    per_token: float
+    per_token_thread: float = 0.0
+    samples: int = 0
+    rmse_ms: float = 0.0
+
+    def predict_ms(self, tokens: np.ndarray, threads: np.ndarray) -> np.ndarray:
+        tokens = np.asarray(tokens, dtype=float)
+        threads = np.maximum(np.asarray(threads, dtype=float), 1.0)
+        ms = self.intercept + self.per_token * tokens + self.per_token_thread * tokens / threads
+        return np.maximum(ms, 0.0)
+
+
+@dataclass
+class DeviceModelFit:
+    prefill: StageFit
+    decode: StageFit
+    threads: int = 1
+    median_output_tokens: int = 0
+
+
+@dataclass
+class LatencyPrediction:
+    prompt_tokens: int
+    output_tokens: int
+    prefill_us: int
+    decode_us: int
+    total_us: int
+
+
+def _fit_stage(tokens: np.ndarray, threads: np.ndarray, target_ms: np.ndarray) -> StageFit:
+    use_threads = len(np.unique(threads)) > 1
+    columns = [np.ones_like(tokens), tokens]
+    if use_threads:
+        columns.append(tokens / threads)
+    design = np.stack(columns, axis=1)
+    coef, *_ = np.linalg.lstsq(design, target_ms, rcond=None)
+    residual = target_ms - design @ coef
+    return StageFit(
+        intercept=float(coef[0]),
+        per_token=float(coef[1]),
+        per_token_thread=float(coef[2]) if use_threads else 0.0,
+        samples=int(len(tokens)),
+        rmse_ms=float(np.sqrt(np.mean(residual**2))),
+    )
+
+
+def _group_key(device: str, model: str) -> str:
+    return f"{device}|{model}"
+
+
+def _row_model(row: dict) -> str:
+    model = row.get("model") or UNKNOWN
+    quant = row.get("quant")
+    return f"{model}-{quant}" if quant and not str(model).endswith(str(quant)) else str(model)
+
+
+class LatencyPredictor:
+    """Per-(device, model) prefill/decode latency models."""
+
+    def __init__(
+        self,
+        fits: Dict[str, DeviceModelFit],
+        token_counter: Optional[TokenCounter] = None,
+    ):
+        self.fits = fits
+        self.token_counter = token_counter
+
+    @classmethod
+    def fit(
+        cls,
+        rows: Iterable[dict],
+        token_counter: Optional[TokenCounter] = None,
+        min_samples: int = 3,
+    ) -> "LatencyPredictor":
+        """Fit from aggregated log rows (docs/logging_guidelines.md).
+
+        Rows need ``prompt_tokens``/``prefill_ms`` or ``output_tokens``/``decode_ms``;
+        ``device``, ``model``/``quant`` and ``threads`` default to "unknown"/1.
+        """
+        groups: Dict[str, List[dict]] = {}
+        for row in rows:
+            key = _group_key(str(row.get("device") or UNKNOWN), _row_model(row))
+            groups.setdefault(key, []).append(row)
+
+        fits: Dict[str, DeviceModelFit] = {}
+        for key, group in groups.items():
+            prefill_rows = [r for r in group if r.get("prefill_ms") is not None and r.get("prompt_tokens")]
+            decode_rows = [r for r in group if r.get("decode_ms") is not None and r.get("output_tokens")]
+            if len(prefill_rows) < min_samples or len(decode_rows) < min_samples:
+                LOGGER.warning("Skipping %s: fewer than %d usable log rows", key, min_samples)
+                continue
+            prefill = _fit_stage(
+                np.array([r["prompt_tokens"] for r in prefill_rows], dtype=float),
+                np.array([r.get("threads") or 1 for r in prefill_rows], dtype=float),
+                np.array([r["prefill_ms"] for r in prefill_rows], dtype=float),
+            )
+            decode = _fit_stage(
+                np.array([r["output_tokens"] for r in decode_rows], dtype=float),
+                np.array([r.get("threads") or 1 for r in decode_rows], dtype=float),
+                np.array([r["decode_ms"] for r in decode_rows], dtype=float),
+            )
+            threads = [int(r.get("threads") or 1) for r in group]
+            fits[key] = DeviceModelFit(
+                prefill=prefill,
+                decode=decode,
+                threads=max(set(threads), key=threads.count),
+                median_output_tokens=int(np.median([r["output_tokens"] for r in decode_rows])),
+            )
+            LOGGER.info(
+                "%s: prefill rmse %.1f ms, decode rmse %.1f ms (%d rows)",
+                key,
+                prefill.rmse_ms,
+                decode.rmse_ms,
+                len(group),
+            )
+        return cls(fits, token_counter)
+
+    def save(self, path: Path = PREDICTOR_PATH) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "tokenizer": str(self.token_counter.tokenizer_path) if self.token_counter else None,
+            "fits": {key: asdict(fit) for key, fit in self.fits.items()},
+        }
+        with path.open("w", encoding="utf-8") as fh:
+            json.dump(payload, fh, indent=2, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: Path = PREDICTOR_PATH, tokenizer_path: Optional[Path] = None) -> "LatencyPredictor":
+        with path.open("r", encoding="utf-8") as fh:
+            payload = json.load(fh)
+        fits = {
+            key: DeviceModelFit(
+                prefill=StageFit(**raw["prefill"]),
+                decode=StageFit(**raw["decode"]),
+                threads=raw.get("threads", 1),
+                median_output_tokens=raw.get("median_output_tokens", 0),
+            )
+            for key, raw in payload["fits"].items()
+        }
+        tokenizer = tokenizer_path or payload.get("tokenizer")
+        return cls(fits, TokenCounter(Path(tokenizer)) if tokenizer else None)
+
+    def _lookup(self, device: str, model: str) -> DeviceModelFit:
+        key = _group_key(device, model)
+        if key not in self.fits:
+            raise KeyError(f"No latency fit for device={device} model={model}; known: {sorted(self.fits)}")
+        return self.fits[key]
+
+    def count_tokens(self, texts: Sequence[str]) -> List[int]:
+        if self.token_counter is None:
+            raise RuntimeError("A tokenizer.json is required to count prompt tokens")
+        return self.token_counter.count(texts)
+
+    def predict_batch(
+        self,
+        queries: Sequence[str],
+        device: str,
+        model: str,
+        *,
+        output_tokens: Optional[Sequence[int]] = None,
+        threads: Optional[int] = None,
+    ) -> List[LatencyPrediction]:
+        """Predict latency in microseconds; output length defaults to the logged median."""
+        fit = self._lookup(device, model)
+        prompt_tokens = np.array(self.count_tokens(queries), dtype=float)
+        outputs = (
+            np.array(output_tokens, dtype=float)
+            if output_tokens is not None
+            else np.full(len(queries), fit.median_output_tokens, dtype=float)
+        )
+        thread_count = np.full(len(queries), threads or fit.threads, dtype=float)
+        prefill_us = np.rint(fit.prefill.predict_ms(prompt_tokens, thread_count) * 1000).astype(int)
+        decode_us = np.rint(fit.decode.predict_ms(outputs, thread_count) * 1000).astype(int)
+        return [
+            LatencyPrediction(
+                prompt_tokens=int(prompt_tokens[idx]),
+                output_tokens=int(outputs[idx]),
+                prefill_us=int(prefill_us[idx]),
+                decode_us=int(decode_us[idx]),
+                total_us=int(prefill_us[idx] + decode_us[idx]),
+            )
+            for idx in range(len(queries))
+        ]
+
+    def predict_latency(
+        self,
+        query: str,
+        device: str,
+        model: str,
+        *,
+        output_tokens: Optional[int] = None,
+        threads: Optional[int] = None,
+    ) -> LatencyPrediction:
+        return self.predict_batch(
+            [query],
+            device,
+            model,
+            output_tokens=None if output_tokens is None else [output_tokens],
+            threads=threads,
+        )[0]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Fit/query the prefill/decode latency predictor")
+    parser.add_argument("command", choices=["fit", "predict"])
+    parser.add_argument("--logs", type=Path, nargs="*", default=[], help="Device JSONL logs to fit from")
+    parser.add_argument("--tokenizer", type=Path, default=None, help="Path to the model's tokenizer.json")
+    parser.add_argument("--predictor", type=Path, default=PREDICTOR_PATH, help="Fitted predictor JSON")
+    parser.add_argument("--min-samples", type=int, default=3, help="Minimum log rows per device/model")
+    parser.add_argument("--query", type=str, default=None)
+    parser.add_argument("--device", type=str, default=UNKNOWN)
+    parser.add_argument("--model", type=str, default=UNKNOWN, help="Model/quant tag as logged")
+    parser.add_argument("--output-tokens", type=int, default=None)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument(
+        "--log-level",
+        type=str,
+        default="INFO",
+        help="Logging level (DEBUG, INFO, WARNING, ERROR)",
+    )
+    args = parser.parse_args()
+    if args.command == "fit" and not args.logs:
+        parser.error("fit requires --logs")
+    if args.command == "predict" and args.query is None:
+        parser.error("predict requires --query")
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(
+        level=getattr(logging, args.log_level.upper(), logging.INFO),
+        format="%(levelname)s - %(message)s",
+    )
+    if args.command == "fit":
+        rows = [row for path in args.logs for row in load_jsonl(path)]
+        counter = TokenCounter(args.tokenizer) if args.tokenizer else None
+        predictor = LatencyPredictor.fit(rows, counter, min_samples=args.min_samples)
+        predictor.save(args.predictor)
+        LOGGER.info("Saved %d latency fits to %s", len(predictor.fits), args.predictor)
+    else:
+        predictor = LatencyPredictor.load(args.predictor, args.tokenizer)
+        prediction = predictor.predict_latency(
+            args.query,
+            args.device,
+            args.model,
+            output_tokens=args.output_tokens,
+            threads=args.threads,
+        )
+        print(json.dumps(asdict(prediction), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,32 +7,35 @@ Stages:
     evaluate- compute metrics on holdout sets and dump reports
     all     - run fetch -> label -> train -> evaluate sequentially
 
+Stages live in ``STAGES`` and declare the heavy modules they need; those are
+imported lazily inside the stage, so ``--stage fetch`` with local files or
+``--stage label`` never pays for pandas/sklearn/datasets.
+
 Usage examples:
     python task_classification_pipeline.py --stage fetch --max-samples 500
     python task_classification_pipeline.py --stage label --llm-config configs/labeler.yaml
     python task_classification_pipeline.py --stage train --model logistic_regression
+    python task_classification_pipeline.py --stage label --import-report
+    python task_classification_pipeline.py --worker --preload train < jobs.jsonl
 """
 
 from __future__ import annotations
 
 import argparse
+import functools
+import importlib
 import json
 import logging
-import os
+import subprocess
+import sys
+import time
 from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
-import numpy as np
-import pandas as pd
-from datasets import Dataset, load_dataset
-from sklearn.compose import ColumnTransformer
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import classification_report
-from sklearn.model_selection import train_test_split
-from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
-from sklearn.tree import DecisionTreeClassifier
+if TYPE_CHECKING:
+    import pandas as pd
+    from sklearn.pipeline import Pipeline
 
 
 LOGGER = logging.getLogger("task_classifier")
@@ -46,6 +49,9 @@ MODEL_DIR = Path("models") / "task_classifier"
 REPORT_DIR = Path("reports")
 
 
+BASE_FEATURE_COLUMNS = ["source", "length", "has_question", "has_now", "text"]
+
+
 TAXONOMY_FIELDS = [
     "complexity",
     "latency",
@@ -139,6 +145,8 @@ def fetch_xsum(max_samples: int) -> List[SampleRecord]:
         )
 
     LOGGER.info("Local XSum file not found; falling back to Hugging Face Hub")
+    from datasets import load_dataset
+
     dataset = load_dataset("xsum", split="test")
     if max_samples:
         dataset = dataset.select(range(min(max_samples, len(dataset))))
@@ -174,6 +182,8 @@ def fetch_conll(max_samples: int) -> List[SampleRecord]:
             )
 
     LOGGER.info("Local grammar dataset not found; falling back to jfleg on Hugging Face Hub")
+    from datasets import load_dataset
+
     dataset = load_dataset("jfleg", split="test")
     if max_samples:
         dataset = dataset.select(range(min(max_samples, len(dataset))))
@@ -286,7 +296,36 @@ def run_label(manual_labels_path: Optional[Path], use_heuristic: bool) -> None:
         LOGGER.info("Queued %d samples for manual review", len(review_queue))
 
 
-def _basic_feature_frame(samples: List[SampleRecord]) -> pd.DataFrame:
+ExtraFeatures = Callable[[List[str]], Dict[str, List[float]]]
+
+
+@functools.lru_cache(maxsize=None)
+def token_extra_features(tokenizer: str) -> ExtraFeatures:
+    """``prompt_tokens`` hook for ``tokenizer``; loaded once and kept across worker jobs."""
+    from latency_predictor import TokenCounter
+
+    return TokenCounter(Path(tokenizer)).feature_columns()
+
+
+def feature_config_path(model_name: str) -> Path:
+    return MODEL_DIR / f"{model_name}_features.json"
+
+
+def load_feature_config(model_name: str) -> Optional[str]:
+    """Tokenizer the exported ``model_name`` classifiers were trained with, if any."""
+    path = feature_config_path(model_name)
+    if not path.exists():
+        LOGGER.warning("%s not found; assuming base features only", path)
+        return None
+    with path.open("r", encoding="utf-8") as fh:
+        return json.load(fh).get("tokenizer")
+
+
+def _basic_feature_frame(
+    samples: List[SampleRecord], extra_features: Optional[ExtraFeatures] = None
+) -> pd.DataFrame:
+    import pandas as pd
+
     records: List[Dict[str, str]] = []
     for sample in samples:
         text = sample.query
@@ -300,10 +339,16 @@ def _basic_feature_frame(samples: List[SampleRecord]) -> pd.DataFrame:
                 "text": text,
             }
         )
-    return pd.DataFrame.from_records(records)
+    frame = pd.DataFrame.from_records(records)
+    if extra_features is not None:
+        for column, values in extra_features([sample.query for sample in samples]).items():
+            frame[column] = values
+    return frame
 
 
 def _labels_frame(labels: List[dict]) -> pd.DataFrame:
+    import pandas as pd
+
     df = pd.DataFrame(labels)
     if "source" in df.columns:
         df = df.rename(columns={"source": "label_source"})
@@ -314,12 +359,23 @@ def train_baseline(
     samples: List[SampleRecord],
     labels: List[dict],
     model_name: str,
+    tokenizer: Optional[str] = None,
 ) -> Tuple[Pipeline, Dict[str, dict]]:
-    features = _basic_feature_frame(samples)
+    from sklearn.compose import ColumnTransformer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import classification_report
+    from sklearn.model_selection import train_test_split
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+    from sklearn.tree import DecisionTreeClassifier
+
+    extra_features = token_extra_features(tokenizer) if tokenizer else None
+    features = _basic_feature_frame(samples, extra_features)
     labels_df = _labels_frame(labels)
+    extra_columns = [c for c in features.columns if c not in BASE_FEATURE_COLUMNS and c != "sample_id"]
     merged = features.join(labels_df, on="sample_id", how="inner")
 
-    X = merged[["source", "length", "has_question", "has_now", "text"]]
+    X = merged[BASE_FEATURE_COLUMNS + extra_columns]
     reports: Dict[str, dict] = {}
     trained_models: Dict[str, Pipeline] = {}
 
@@ -329,7 +385,7 @@ def train_baseline(
             X, y, test_size=0.2, random_state=42, stratify=y
         )
 
-        numeric_features = ["length"]
+        numeric_features = ["length", *extra_columns]
         categorical_features = ["source", "has_question", "has_now"]
 
         preprocessor = ColumnTransformer(
@@ -368,14 +424,21 @@ def train_baseline(
             joblib.dump(clf, path)
         except ImportError:
             LOGGER.warning("joblib not installed; skipping model export for %s", axis)
+    with feature_config_path(model_name).open("w", encoding="utf-8") as fh:
+        json.dump(
+            {"extra_columns": extra_columns, "tokenizer": tokenizer},
+            fh,
+            indent=2,
+            ensure_ascii=False,
+        )
 
     return clf, reports
 
 
-def run_train(model_name: str) -> Dict[str, dict]:
+def run_train(model_name: str, tokenizer: Optional[str] = None) -> Dict[str, dict]:
     samples = [SampleRecord(**row) for row in load_jsonl(PROCESSED_DIR / "combined_samples.jsonl")]
     labels = load_jsonl(LABEL_DIR / "labels.jsonl")
-    _, reports = train_baseline(samples, labels, model_name)
+    _, reports = train_baseline(samples, labels, model_name, tokenizer)
     REPORT_DIR.mkdir(parents=True, exist_ok=True)
     save_jsonl(
         REPORT_DIR / f"{model_name}_metrics.jsonl",
@@ -385,20 +448,223 @@ def run_train(model_name: str) -> Dict[str, dict]:
     return reports
 
 
-def run_evaluate(model_name: str) -> None:
+def run_evaluate(model_name: str, tokenizer: Optional[str] = None) -> None:
     samples = [SampleRecord(**row) for row in load_jsonl(PROCESSED_DIR / "combined_samples.jsonl")]
     labels = load_jsonl(LABEL_DIR / "labels.jsonl")
-    _, reports = train_baseline(samples, labels, model_name)
+    _, reports = train_baseline(samples, labels, model_name, tokenizer)
     LOGGER.info("Evaluation complete for %s", model_name)
 
 
+@dataclass
+class Stage:
+    """Pipeline stage plus the heavy modules it imports lazily.
+
+    ``modules`` are always needed by the stage; ``optional_modules`` are only
+    imported on some code paths (e.g. the Hub fallback in fetch).
+    """
+
+    name: str
+    runner: Callable[[argparse.Namespace], object]
+    modules: Tuple[str, ...] = ()
+    optional_modules: Tuple[str, ...] = ()
+
+    def all_modules(self) -> Tuple[str, ...]:
+        return self.modules + self.optional_modules
+
+
+TRAIN_MODULES = (
+    "pandas",
+    "sklearn.compose",
+    "sklearn.linear_model",
+    "sklearn.metrics",
+    "sklearn.model_selection",
+    "sklearn.pipeline",
+    "sklearn.preprocessing",
+    "sklearn.tree",
+    "joblib",
+)
+
+# Only needed with --tokenizer (token counting in latency_predictor.py).
+TOKEN_FEATURE_MODULES = ("tokenizers",)
+
+STAGES: Dict[str, Stage] = {
+    stage.name: stage
+    for stage in (
+        Stage(
+            "fetch",
+            lambda args: run_fetch(args.max_samples, args.app_data),
+            optional_modules=("datasets",),
+        ),
+        Stage("label", lambda args: run_label(args.manual_labels, args.use_heuristic)),
+        Stage(
+            "train",
+            lambda args: run_train(args.model, tokenizer_config(args)),
+            TRAIN_MODULES,
+            optional_modules=TOKEN_FEATURE_MODULES,
+        ),
+        Stage(
+            "evaluate",
+            lambda args: run_evaluate(args.model, tokenizer_config(args)),
+            TRAIN_MODULES,
+            optional_modules=TOKEN_FEATURE_MODULES,
+        ),
+    )
+}
+
+
+def tokenizer_config(args: argparse.Namespace) -> Optional[str]:
+    """Tokenizer for the prompt_tokens feature from the command line or a worker job."""
+    return str(args.tokenizer) if args.tokenizer else None
+
+
+def resolve_stages(stage: str) -> List[Stage]:
+    if stage == "all":
+        return list(STAGES.values())
+    if stage not in STAGES:
+        raise ValueError(f"Unknown stage {stage}")
+    return [STAGES[stage]]
+
+
+def preload_modules(stages: Iterable[Stage], include_optional: bool = False) -> Dict[str, float]:
+    """Import declared modules in-process and return wall time per module in ms."""
+    timings: Dict[str, float] = {}
+    for stage in stages:
+        modules = stage.all_modules() if include_optional else stage.modules
+        for module in modules:
+            if module in timings:
+                continue
+            start = time.perf_counter()
+            try:
+                importlib.import_module(module)
+            except ImportError:
+                LOGGER.warning("Stage %s: module %s is not installed", stage.name, module)
+                continue
+            timings[module] = (time.perf_counter() - start) * 1000.0
+    return timings
+
+
+def _importtime(modules: Sequence[str]) -> Optional[List[Tuple[int, int, int, str]]]:
+    """Run ``import a, b, ...`` under ``python -X importtime`` in a fresh interpreter.
+
+    Returns ``(depth, self_us, cumulative_us, name)`` per imported module, or None
+    if the import fails.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        return None
+    # Lines look like "import time:   self [us] | cumulative | imported package",
+    # with the package name indented by two spaces per nesting level.
+    entries: List[Tuple[int, int, int, str]] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, int(fields[0]), int(fields[1]), name.strip()))
+    return entries
+
+
+def measure_import_time(module: str) -> Optional[Dict[str, int]]:
+    """Cold import cost of ``module`` alone, including all of its dependencies.
+
+    Returns ``{"self_us", "cumulative_us"}`` for the top-level import, or None if
+    the module cannot be imported.
+    """
+    entries = _importtime([module])
+    for depth, self_us, cumulative_us, name in reversed(entries or []):
+        if depth == 0 and name == module:
+            return {"self_us": self_us, "cumulative_us": cumulative_us}
+    return None
+
+
+def measure_stage_import_time(modules: Sequence[str]) -> Optional[int]:
+    """Cold import cost of ``modules`` together, with shared dependencies counted once."""
+    if not modules:
+        return 0
+    entries = _importtime(modules)
+    if entries is None:
+        return None
+    return sum(cumulative_us for depth, _, cumulative_us, _ in entries if depth == 0)
+
+
+def run_import_report(stages: Iterable[Stage]) -> List[dict]:
+    """Per-stage import cost; per-module rows are standalone costs and overlap each other."""
+    rows: List[dict] = []
+    for stage in stages:
+        installed: List[str] = []
+        for module in stage.all_modules():
+            timing = measure_import_time(module)
+            if timing is None:
+                rows.append({"stage": stage.name, "module": module, "installed": False})
+                continue
+            installed.append(module)
+            rows.append({"stage": stage.name, "module": module, "installed": True, "standalone": True, **timing})
+        total_us = measure_stage_import_time(installed) or 0
+        rows.append({"stage": stage.name, "module": "<total>", "cumulative_us": total_us})
+        LOGGER.info("Stage %-8s lazy import cost: %.1f ms", stage.name, total_us / 1000.0)
+    REPORT_DIR.mkdir(parents=True, exist_ok=True)
+    save_jsonl(REPORT_DIR / "import_times.jsonl", rows)
+    LOGGER.info("Saved import-time report to %s", REPORT_DIR / "import_times.jsonl")
+    return rows
+
+
+def run_stage(stage: Stage, args: argparse.Namespace) -> Dict[str, float]:
+    """Run one stage and return its timing breakdown (import vs total, in ms)."""
+    start = time.perf_counter()
+    import_ms = sum(preload_modules([stage]).values())
+    stage.runner(args)
+    elapsed_ms = (time.perf_counter() - start) * 1000.0
+    LOGGER.info("Stage %s finished in %.1f ms (imports %.1f ms)", stage.name, elapsed_ms, import_ms)
+    return {"elapsed_ms": elapsed_ms, "import_ms": import_ms}
+
+
+def run_worker(defaults: argparse.Namespace, preload: List[str]) -> None:
+    """Long-lived mode: read one JSON job per stdin line, reply with one JSON line on stdout.
+
+    A job is ``{"stage": "train", "model": "decision_tree", ...}``; keys override
+    the command-line defaults. Modules stay imported between jobs.
+    """
+    warmup = preload_modules((STAGES[name] for name in preload), include_optional=True)
+    LOGGER.info("Worker ready; preloaded %d modules in %.1f ms", len(warmup), sum(warmup.values()))
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            job = json.loads(line)
+            args = argparse.Namespace(**{**vars(defaults), **job})
+            for key in ("app_data", "manual_labels", "tokenizer"):
+                if isinstance(getattr(args, key), str):
+                    setattr(args, key, Path(getattr(args, key)))
+            ensure_directories()
+            timings = [run_stage(stage, args) for stage in resolve_stages(args.stage)]
+            reply = {
+                "stage": args.stage,
+                "status": "ok",
+                "elapsed_ms": round(sum(t["elapsed_ms"] for t in timings), 3),
+                "import_ms": round(sum(t["import_ms"] for t in timings), 3),
+            }
+        except Exception as exc:  # keep the worker alive for the next job
+            LOGGER.exception("Worker job failed")
+            reply = {"job": line.strip(), "status": "error", "error": str(exc)}
+        sys.stdout.write(json.dumps(reply, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Task classification experiment pipeline")
     parser.add_argument(
         "--stage",
         type=str,
-        required=True,
-        choices=["fetch", "label", "train", "evaluate", "all"],
+        default=None,
+        choices=[*STAGES, "all"],
+        help="Stage to run (required unless --worker)",
     )
     parser.add_argument("--max-samples", type=int, default=0, help="Limit samples per public dataset")
     parser.add_argument("--app-data", type=Path, default=None, help="Path to app requests JSONL")
@@ -421,7 +687,33 @@ def parse_args() -> argparse.Namespace:
         default="INFO",
         help="Logging level (DEBUG, INFO, WARNING, ERROR)",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--tokenizer",
+        type=Path,
+        default=None,
+        help="Deployed model's tokenizer.json; adds its prompt_tokens count as a feature",
+    )
+    parser.add_argument(
+        "--import-report",
+        action="store_true",
+        help="Measure cold import time of each selected stage's modules (python -X importtime)",
+    )
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="Serve JSON stage jobs from stdin, keeping imported modules loaded",
+    )
+    parser.add_argument(
+        "--preload",
+        nargs="*",
+        default=[],
+        choices=list(STAGES),
+        help="Stages whose modules the worker imports before accepting jobs",
+    )
+    args = parser.parse_args()
+    if args.stage is None and not args.worker:
+        parser.error("--stage is required unless --worker is given")
+    return args
 
 
 def main() -> None:
@@ -432,14 +724,15 @@ def main() -> None:
     )
     ensure_directories()
 
-    if args.stage in ("fetch", "all"):
-        run_fetch(args.max_samples, args.app_data)
-    if args.stage in ("label", "all"):
-        run_label(args.manual_labels, args.use_heuristic)
-    if args.stage in ("train", "all"):
-        run_train(args.model)
-    if args.stage in ("evaluate", "all"):
-        run_evaluate(args.model)
+    if args.worker:
+        run_worker(args, args.preload)
+        return
+
+    stages = resolve_stages(args.stage)
+    if args.import_report:
+        run_import_report(stages)
+    for stage in stages:
+        run_stage(stage, args)
 
 
 if __name__ == "__main__":